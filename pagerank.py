@@ -1,3 +1,4 @@
+import math
 import os
 import random
 import re
@@ -5,6 +6,8 @@ import sys
 
 DAMPING = 0.85
 SAMPLES = 10000
+SWEEP_COMPILE_COST = 40
+LINK_RE = re.compile(rb"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
 
 
 def main():
@@ -13,12 +16,10 @@ def main():
     corpus = crawl(sys.argv[1])
     ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
     print(f"PageRank Results from Sampling (n = {SAMPLES})")
-    for page in sorted(ranks):
-        print(f"  {page}: {ranks[page]:.4f}")
+    sys.stdout.write("".join(f"  {page}: {ranks[page]:.4f}\n" for page in sorted(ranks)))
     ranks = iterate_pagerank(corpus, DAMPING)
     print(f"PageRank Results from Iteration")
-    for page in sorted(ranks):
-        print(f"  {page}: {ranks[page]:.4f}")
+    sys.stdout.write("".join(f"  {page}: {ranks[page]:.4f}\n" for page in sorted(ranks)))
 
 
 def crawl(directory):
@@ -30,24 +31,42 @@ def crawl(directory):
     pages = dict()
 
     # Extract all links from HTML files
-    for filename in os.listdir(directory):
-        if not filename.endswith(".html"):
-            continue
-        with open(os.path.join(directory, filename)) as f:
-            contents = f.read()
-            links = re.findall(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"", contents)
-            pages[filename] = set(links) - {filename}
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            filename = entry.name
+            if not filename.endswith(".html") or not entry.is_file():
+                continue
+            # Read the whole file in one unbuffered call
+            fd = os.open(entry.path, os.O_RDONLY)
+            try:
+                contents = os.read(fd, entry.stat().st_size)
+            finally:
+                os.close(fd)
+            links = LINK_RE.findall(contents)
+            pages[filename] = set(link.decode() for link in links) - {filename}
 
     # Only include links to other pages in the corpus
+    keys = pages.keys()
     for filename in pages:
-        pages[filename] = set(
-            link for link in pages[filename]
-            if link in pages
-        )
+        pages[filename] = pages[filename] & keys
 
     return pages
 
 
+def index_corpus(corpus):
+    """
+    Number the pages of `corpus` from 0 to N-1.
+
+    Return a tuple `(pages, neighbors)`, where `pages` is a list of page
+    names in id order and `neighbors[i]` is a tuple of the ids of all
+    pages linked to by page i.
+    """
+    pages = list(corpus)
+    idx = {page: i for i, page in enumerate(pages)}
+    neighbors = [tuple(idx[link] for link in corpus[page]) for page in pages]
+    return pages, neighbors
+
+
 def transition_model(corpus, page, damping_factor):
     """
     Return a probability distribution over which page to visit next,
@@ -78,13 +97,15 @@ def transition_model(corpus, page, damping_factor):
     # If page has no outgoing links, then transition_model should return a probability distribution that chooses randomly among all pages with equal probability. 
     # (In other words, if a page has no links, we can pretend it has links to all pages in the corpus, including itself.)
 
-    prob = dict()
+    # A page with no links behaves as if it linked to every page
+    links = corpus[page]
+    if not links:
+        return dict.fromkeys(corpus, 1/len(corpus))
 
-    for web in corpus:
-        prob[web] = (1-damping_factor)/len(corpus)
+    prob = dict.fromkeys(corpus, (1-damping_factor)/len(corpus))
 
-    for link in corpus[page]:
-        prob[link] += damping_factor/len(corpus[page])
+    for link in links:
+        prob[link] += damping_factor/len(links)
     
     return prob
     
@@ -115,25 +136,51 @@ def sample_pagerank(corpus, damping_factor, n):
     #     and 47.5% of the time the next sample generated should be "3.html".
     # You may assume that n will be at least 1.
 
-    prank = dict()
+    # Precompute each page's outgoing links as indices into `pages` once,
+    # instead of rebuilding the transition model for every sample.
+    pages, neighbors = index_corpus(corpus)
+    counts = sample_counts(neighbors, damping_factor, n)
 
-    for web in corpus:
-        prank[web] = 0
+    return {pages[i]: counts[i] / n for i in range(len(pages))}
 
-    page = random.choice(list(corpus.keys()))
-    prank[page] += 1/n
-    for i in range(n):
-        dist = transition_model(corpus, page, damping_factor)
-        page = random.choices(list(dist.keys()), weights=list(dist.values()), k=1)[0]
-        prank[page] += 1/n
-
-    return prank
 
+def sample_counts(neighbors, damping_factor, n):
+    """
+    Walk `n` samples of the random surfer over pages numbered 0 to N-1,
+    where `neighbors[i]` is a sequence of the pages linked to by page i.
 
-def iterate_pagerank(corpus, damping_factor):
+    Return a list of how many samples landed on each page.
+    """
+    N = len(neighbors)
+    counts = [0] * N
+
+    # Each step is a two-way mixture, so it needs at most two uniform draws:
+    # one to decide whether to follow a link and one to pick the next page.
+    # `int(rand() * k)` is a uniform index below k and, unlike
+    # `random.randrange`, stays in C.
+    rand = random.random
+    page = int(rand() * N)
+    counts[page] += 1
+    for i in range(n - 1):
+        links = neighbors[page]
+        if links and rand() < damping_factor:
+            page = links[int(rand() * len(links))]
+        else:
+            page = int(rand() * N)
+        counts[page] += 1
+
+    return counts
+
+
+def iterate_pagerank(corpus, damping_factor, tol=0.001, max_iter=1000, gauss_seidel=False):
     """
     Return PageRank values for each page by iteratively updating
-    PageRank values until convergence.
+    PageRank values until no value changes by more than `tol`, or
+    until `max_iter` updates have been made.
+
+    If `gauss_seidel` is true, update ranks in place, most-linked pages
+    first, so each update already uses the ones made earlier in the same
+    sweep. This usually converges in fewer sweeps.
 
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
@@ -151,31 +198,113 @@ def iterate_pagerank(corpus, damping_factor):
     #     A page that has no links at all should be interpreted as having one link for every page in the corpus (including itself).
     # This process should repeat until no PageRank value changes by more than 0.001 between the current rank values and the new rank values.
 
-    rank = dict()
+    pages, neighbors = index_corpus(corpus)
+    N = len(pages)
+
+    # Precompute each page's inverse out-degree and, for every page, the
+    # pages that link to it, so a sweep only visits real predecessors.
+    inv_out = [1/len(links) if links else 0 for links in neighbors]
+    inbound = [[] for _ in range(N)]
+    for i, links in enumerate(neighbors):
+        for link in links:
+            inbound[link].append((i, inv_out[i]))
+
+    # Pages with no links spread their rank evenly over every page
+    dangling = [i for i, links in enumerate(neighbors) if not links]
+
+    # Jacobi sweeps write into new_rank and then swap it with rank, so the
+    # two buffers are reused for every sweep
+    rank = [1/N] * N
+    new_rank = [0] * N
+    sweep = None
+    prev_delta = 0
+
+    if gauss_seidel:
+        order = sorted(range(N), key=lambda i: len(inbound[i]), reverse=True)
+        dangling_mass = sum(rank[i] for i in dangling)
+
+    for _ in range(max_iter):
+        if gauss_seidel:
+            # Update in place, so later pages in the sweep already see
+            # this sweep's values, including any change in dangling mass
+            delta = 0
+            teleport = (1-damping_factor)/N + damping_factor*dangling_mass/N
+            for i in order:
+                value = teleport + damping_factor*sum(rank[src]*weight for src, weight in inbound[i])
+                change = abs(value - rank[i])
+                if not neighbors[i]:
+                    dangling_mass += value - rank[i]
+                    teleport = (1-damping_factor)/N + damping_factor*dangling_mass/N
+                rank[i] = value
+                if change > delta:
+                    delta = change
+            if delta <= tol:
+                break
+            continue
 
-    for web in corpus:
-        rank[web] = 1/len(corpus)
-    
-    check = True
-
-    while check:
-        count = 0
-        for web in corpus:
-            sigma = 0
-            for link in corpus:
-                if web in corpus[link]:
-                    sigma += rank[link]/len(corpus[link])
-                elif not corpus[link]:
-                    sigma += rank[link]/len(corpus)
-            prob = (1-damping_factor)/len(corpus) + damping_factor*sigma
-            if abs(rank[web] - prob) <= 0.001:
-                count += 1
-            rank[web] = prob
-
-        if count >= len(corpus):
-            check = False
-
-    return rank
+        # Random jumps and dangling pages add the same share to every page,
+        # so fold them into one constant per sweep.
+        dangling_mass = sum(rank[i] for i in dangling)
+        teleport = (1-damping_factor)/N + damping_factor*dangling_mass/N
+        if sweep:
+            sweep(rank, teleport, new_rank)
+        else:
+            for i, row in enumerate(inbound):
+                new_rank[i] = teleport + damping_factor*sum(rank[src]*weight for src, weight in row)
+
+        delta = max(abs(new - old) for new, old in zip(new_rank, rank))
+        rank, new_rank = new_rank, rank
+        if delta <= tol:
+            break
+
+        # Generating a specialized sweep costs about SWEEP_COMPILE_COST plain
+        # sweeps, so only do it once the convergence rate so far suggests
+        # at least that many sweeps are left
+        if sweep is None and 0 < tol < delta < prev_delta:
+            remaining = math.log(tol/delta) / math.log(delta/prev_delta)
+            if remaining > SWEEP_COMPILE_COST:
+                sweep = compile_sweep(inbound, damping_factor)
+        prev_delta = delta
+
+    # In-place updates only approach a total of 1, so rescale to it
+    if gauss_seidel:
+        total = sum(rank)
+        rank = [value/total for value in rank]
+
+    return dict(zip(pages, rank))
+
+
+def compile_sweep(inbound, damping_factor, chunk=256, terms=64):
+    """
+    Generate a function `sweep(rank, teleport, out)` specialized to one
+    link structure, where `inbound[i]` is a list of `(source, weight)`
+    pairs for the pages that link to page i.
+
+    The returned function writes the next rank of every page into `out`
+    as `teleport + damping_factor * sum(rank[source] * weight)`, with the
+    sources and damped weights written into its code as literals.
+    """
+    lines = ["def sweep(r, t, out):"]
+    for start in range(0, len(inbound), chunk):
+        values = []
+        for row in inbound[start:start + chunk]:
+            products = [f"r[{src}]*{damping_factor*weight!r}" for src, weight in row]
+            # Long `+` chains nest deeply in the compiler, so sum pages
+            # with many in-links in groups
+            groups = ["+".join(products[k:k + terms]) for k in range(0, len(products), terms)]
+            if not groups:
+                values.append("t")
+            elif len(groups) == 1:
+                values.append(f"t+{groups[0]}")
+            else:
+                values.append(f"t+sum(({','.join(groups)},))")
+        lines.append(f"    out[{start}:{start + len(values)}] = [{','.join(values)}]")
+    if not inbound:
+        lines.append("    pass")
+
+    namespace = {}
+    exec(compile("\n".join(lines), "<sweep>", "exec"), namespace)
+    return namespace["sweep"]
 
 
 if __name__ == "__main__":